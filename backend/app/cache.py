@@ -1,20 +1,122 @@
-import time
-from typing import Dict, Optional, List
+from typing import Optional, List, Tuple, Union
 import logging
+import time
+
+from cachetools import TTLCache
+import orjson
 
 from .models import Post
 from .utils.config import API_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Tuple keys such as (source, name) hash without building a joined string
+CacheKey = Union[str, Tuple[str, ...]]
+
+class RedisBackend:
+    """Shared cache store in Redis, so multiple worker processes reuse each other's fetches"""
+    
+    def __init__(self, url: str, prefix: str = "pengwhisp:"):
+        # Imported here so redis is only required when a Redis URL is configured
+        import redis.asyncio as redis
+        
+        # Without socket timeouts an unreachable Redis blocks every cache miss
+        # instead of raising, so the fall-through to Reddit never happens
+        self.client = redis.Redis.from_url(
+            url,
+            socket_timeout=API_CONFIG['redis_timeout'],
+            socket_connect_timeout=API_CONFIG['redis_timeout']
+        )
+        self.prefix = prefix
+        self.errors = (redis.RedisError, OSError)
+    
+    def _redis_key(self, key: CacheKey) -> str:
+        """Flatten a cache key into a Redis key string"""
+        if isinstance(key, tuple):
+            key = ":".join(key)
+        return self.prefix + key
+    
+    async def get(self, key: CacheKey) -> Optional[List[Post]]:
+        """
+        Get posts from Redis
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached posts or None if not found or Redis is unavailable
+        """
+        try:
+            raw = await self.client.get(self._redis_key(key))
+        except self.errors as e:
+            logger.warning(f"Redis get failed for key {key}: {str(e)}")
+            return None
+        
+        if raw is None:
+            return None
+        
+        try:
+            return [Post.model_validate(item) for item in orjson.loads(raw)]
+        except (ValueError, TypeError) as e:
+            # Corrupt entry or one written under an older Post schema (pydantic's
+            # ValidationError is a ValueError); drop it so it is refetched
+            logger.warning(f"Discarding undecodable Redis entry for key {key}: {str(e)}")
+            await self.delete(key)
+            return None
+    
+    async def delete(self, key: CacheKey) -> None:
+        """
+        Remove a key from Redis
+        
+        Args:
+            key: Cache key
+        """
+        try:
+            await self.client.delete(self._redis_key(key))
+        except self.errors as e:
+            logger.warning(f"Redis delete failed for key {key}: {str(e)}")
+    
+    async def set(self, key: CacheKey, data: List[Post], ttl: int) -> None:
+        """
+        Store posts in Redis, letting Redis expire them after ttl seconds
+        
+        Args:
+            key: Cache key
+            data: Posts to cache
+            ttl: Time to live in seconds
+        """
+        raw = orjson.dumps([post.model_dump(mode="json") for post in data])
+        try:
+            await self.client.set(self._redis_key(key), raw, ex=ttl)
+        except self.errors as e:
+            logger.warning(f"Redis set failed for key {key}: {str(e)}")
+    
+    async def close(self) -> None:
+        """Close the Redis connection pool"""
+        await self.client.aclose()
+
 class Cache:
-    """Simple in-memory cache with TTL support"""
+    """
+    Simple in-memory cache with TTL support
     
-    def __init__(self, ttl: int = None):
+    With a backend configured, the in-memory cache acts as L1 in front of a
+    shared L2 store; use fetch/store for two-tier access. An L2 hit is promoted
+    into L1 with a full TTL, so data can be served for up to twice the TTL
+    after it was first stored.
+    """
+    
+    def __init__(self, ttl: int = None, maxsize: int = None, backend: Optional[RedisBackend] = None):
         self.ttl = ttl or API_CONFIG['cache_ttl']
-        self.cache: Dict[str, tuple] = {}  # key -> (data, timestamp)
+        self.maxsize = maxsize or API_CONFIG['cache_max_entries']
+        # Bounded LRU that expires entries lazily on a monotonic clock
+        self.cache: TTLCache = TTLCache(maxsize=self.maxsize, ttl=self.ttl)
+        # Last get_stats result, reused for stats_interval seconds
+        self.stats_interval = 1.0
+        self._stats: Optional[dict] = None
+        self._stats_time = 0.0
+        self.backend = backend
     
-    def get(self, key: str) -> Optional[List[Post]]:
+    def get(self, key: CacheKey) -> Optional[List[Post]]:
         """
         Get data from cache if it exists and hasn't expired
         
@@ -24,32 +126,65 @@ class Cache:
         Returns:
             Cached data or None if not found/expired
         """
-        if key not in self.cache:
-            return None
-        
-        data, timestamp = self.cache[key]
-        
-        # Check if cache entry has expired
-        if time.time() - timestamp > self.ttl:
-            logger.debug(f"Cache entry expired for key: {key}")
-            del self.cache[key]
+        try:
+            data = self.cache[key]
+        except KeyError:
             return None
         
         logger.debug(f"Cache hit for key: {key}")
         return data
     
-    def set(self, key: str, data: List[Post]) -> None:
+    def set(self, key: CacheKey, data: List[Post]) -> None:
         """
-        Set data in cache with current timestamp
+        Set data in cache, evicting the least recently used entry when full
         
         Args:
             key: Cache key
             data: Data to cache
         """
-        self.cache[key] = (data, time.time())
+        self.cache[key] = data
         logger.debug(f"Cached data for key: {key}")
     
-    def delete(self, key: str) -> bool:
+    async def fetch(self, key: CacheKey) -> Optional[List[Post]]:
+        """
+        Get data from L1, falling back to the shared backend and promoting hits to L1
+        
+        Promoted entries get a fresh L1 TTL, bounding staleness at twice the TTL.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached data or None if not found/expired in either tier
+        """
+        data = self.get(key)
+        if data is not None or self.backend is None:
+            return data
+        
+        data = await self.backend.get(key)
+        if data is not None:
+            logger.debug(f"Shared cache hit for key: {key}")
+            self.set(key, data)
+        return data
+    
+    async def store(self, key: CacheKey, data: List[Post]) -> None:
+        """
+        Set data in L1 and, if configured, the shared backend
+        
+        Args:
+            key: Cache key
+            data: Data to cache
+        """
+        self.set(key, data)
+        if self.backend is not None:
+            await self.backend.set(key, data, self.ttl)
+    
+    async def close(self) -> None:
+        """Release the shared backend connection, if any"""
+        if self.backend is not None:
+            await self.backend.close()
+    
+    def delete(self, key: CacheKey) -> bool:
         """
         Delete data from cache
         
@@ -59,15 +194,18 @@ class Cache:
         Returns:
             True if key was deleted, False if key didn't exist
         """
-        if key in self.cache:
+        try:
             del self.cache[key]
-            logger.debug(f"Deleted cache entry for key: {key}")
-            return True
-        return False
+        except KeyError:
+            return False
+        
+        logger.debug(f"Deleted cache entry for key: {key}")
+        return True
     
     def clear(self) -> None:
         """Clear all cache entries"""
         self.cache.clear()
+        self._stats = None
         logger.info("Cache cleared")
     
     def cleanup_expired(self) -> int:
@@ -77,42 +215,41 @@ class Cache:
         Returns:
             Number of entries removed
         """
-        current_time = time.time()
-        expired_keys = []
+        expired = self.cache.expire()
         
-        for key, (_, timestamp) in self.cache.items():
-            if current_time - timestamp > self.ttl:
-                expired_keys.append(key)
+        if expired:
+            logger.info(f"Cleaned up {len(expired)} expired cache entries")
         
-        for key in expired_keys:
-            del self.cache[key]
-        
-        if expired_keys:
-            logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
-        
-        return len(expired_keys)
+        return len(expired)
     
     def get_stats(self) -> dict:
         """
         Get cache statistics
         
+        Results are memoized for stats_interval seconds so frequent polling
+        does not sweep the cache on every call.
+        
         Returns:
             Dictionary with cache stats
         """
-        current_time = time.time()
-        total_entries = len(self.cache)
-        expired_entries = 0
+        now = time.monotonic()
+        if self._stats is not None and now - self._stats_time < self.stats_interval:
+            return dict(self._stats)
         
-        for _, (_, timestamp) in self.cache.items():
-            if current_time - timestamp > self.ttl:
-                expired_entries += 1
+        # Expired entries are evicted by the sweep, so count them as it runs
+        expired_entries = len(self.cache.expire())
+        valid_entries = len(self.cache)
+        total_entries = valid_entries + expired_entries
         
-        return {
+        self._stats = {
             'total_entries': total_entries,
-            'valid_entries': total_entries - expired_entries,
+            'valid_entries': valid_entries,
             'expired_entries': expired_entries,
+            'max_entries': self.maxsize,
             'ttl': self.ttl
         }
+        self._stats_time = now
+        return dict(self._stats)
     
     def size(self) -> int:
         """Get current cache size (number of entries)"""
@@ -1,23 +1,153 @@
-from fastapi import FastAPI, HTTPException, Response, Query
+from fastapi import FastAPI, HTTPException, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from types import MappingProxyType
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import heapq
 import logging
+import os
 import re
 import aiohttp
+import orjson
+import xxhash
 
-from .models import RiverResponse, Post
-from .services.reddit_service import RedditService
+from .models import RiverResponse, Post, RedditPost
+from .services.reddit_service import RedditService, FetchStatus
 from .services.sentiment_service import SentimentService
-from .services.relevance_service import RelevanceService
+from .services.relevance_service import get_relevance_service
 from .services.river_service import RiverService
 from .services.subreddit_search_service import SubredditSearchService
-from .cache import Cache
+from .cache import Cache, CacheKey, RedisBackend
+from .utils.config import API_CONFIG
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def _fetch_from_multiple_sources(subreddit_name: str, limit: int) -> List[Post]:
+# Subreddit names: alphanumeric, underscores, hyphens only, max 21 chars
+_SUBREDDIT_NAME_RE = re.compile(r'^[a-z0-9_-]{1,21}$')
+
+# Reserved/invalid subreddit names
+_RESERVED_SUBREDDITS = frozenset({'www', 'api', 'blog', 'help', 'info', 'mod', 'moderators', 'i', 'me', 'r'})
+
+# Browser-like headers for image hosts that reject non-browser clients
+_IMAGE_PROXY_HEADERS = MappingProxyType({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate, br",
+    "DNT": "1",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    "Sec-Fetch-Dest": "image",
+    "Sec-Fetch-Mode": "no-cors",
+    "Sec-Fetch-Site": "cross-site",
+    "Referer": "https://www.reddit.com/"
+})
+
+_IMAGE_PROXY_TIMEOUT = aiohttp.ClientTimeout(total=30)
+
+# In-flight river builds keyed by cache key, so concurrent misses share one fetch
+_inflight: Dict[CacheKey, asyncio.Task] = {}
+
+async def _coalesce(key: CacheKey, factory: Callable[..., Awaitable], *args):
+    """
+    Run factory(*args) at most once per key at a time
+    
+    Concurrent callers with the same key await the same task instead of
+    repeating the work. The task is shielded so a disconnecting client does
+    not cancel the build for the others.
+    
+    Args:
+        key: Key identifying the unit of work
+        factory: Coroutine function producing the result
+        
+    Returns:
+        Result of the shared task
+    """
+    task = _inflight.get(key)
+    
+    if task is None:
+        task = asyncio.create_task(factory(*args))
+        _inflight[key] = task
+        
+        def _release(done: asyncio.Task) -> None:
+            if _inflight.get(key) is done:
+                del _inflight[key]
+        
+        task.add_done_callback(_release)
+    else:
+        logger.info(f"Joining in-flight request for {key}")
+    
+    return await asyncio.shield(task)
+
+def _process_posts(reddit_posts: List[RedditPost], min_importance: Optional[float] = None) -> List[Post]:
+    """
+    Analyze and score a batch of Reddit posts
+    
+    Sentiment, tech tags and importance scores are each computed for the
+    whole batch at once.
+    
+    Args:
+        reddit_posts: Raw posts to process
+        min_importance: If set, posts scoring below it are dropped before a
+            Post is built for them
+        
+    Returns:
+        Processed posts, in input order
+    """
+    texts = [post.text for post in reddit_posts]
+    sentiments = sentiment_service.analyze_batch(texts)
+    tag_lists = relevance_service.extract_tech_tags_batch(texts)
+    
+    importances = river_service.calculate_importance_batch(reddit_posts, sentiments, tag_lists).tolist()
+    
+    processed_posts = []
+    for post, sentiment, tech_tags, importance in zip(reddit_posts, sentiments, tag_lists, importances):
+        if min_importance is not None and importance < min_importance:
+            continue
+        
+        # Fields come from validated RedditPosts and our own scoring, so skip re-validation
+        processed_posts.append(Post.model_construct(
+            id=post.id,
+            text=post.text,
+            url=post.url,
+            importance_score=importance,
+            sentiment_label=sentiment.label,
+            sentiment_score=sentiment.score,
+            tech_tags=tech_tags,
+            created_at=post.created_at,
+            score=post.score,
+            comments=post.comments,
+            image_url=post.image_url,
+            thumbnail_url=post.thumbnail_url,
+            post_hint=post.post_hint,
+            has_image=post.has_image
+        ))
+    
+    return processed_posts
+
+async def _process_posts_in_executor(
+    reddit_posts: List[RedditPost],
+    min_importance: Optional[float] = None
+) -> List[Post]:
+    """Run _process_posts on the worker pool so scoring does not block the event loop"""
+    loop = asyncio.get_running_loop()
+    # None falls back to the loop's default executor when lifespan has not run
+    return await loop.run_in_executor(getattr(app.state, "executor", None), _process_posts, reddit_posts, min_importance)
+
+def _take_unseen(reddit_posts: List[RedditPost], seen_post_ids: set) -> List[RedditPost]:
+    """Return posts whose IDs are not in seen_post_ids, recording them as seen"""
+    unseen_posts = []
+    for post in reddit_posts:
+        if post.id not in seen_post_ids:
+            seen_post_ids.add(post.id)
+            unseen_posts.append(post)
+    return unseen_posts
+
+async def _fetch_from_multiple_sources(subreddit_name: str, limit: int) -> Tuple[List[Post], FetchStatus, bool]:
     """
     Fetch posts from multiple related subreddits for better content diversity
     
@@ -26,41 +156,27 @@ async def _fetch_from_multiple_sources(subreddit_name: str, limit: int) -> List[
         limit: Maximum number of posts to return
         
     Returns:
-        List of posts from multiple sources
+        Tuple of (unsorted posts from multiple sources that meet the importance
+        threshold, fetch status of the primary subreddit, whether any source
+        returned posts before filtering)
     """
     all_posts = []
     seen_post_ids = set()
+    primary_status: FetchStatus = "empty"
+    
+    # Look up related subreddits while the primary listing is being fetched
+    related_task = asyncio.create_task(subreddit_search_service.search_subreddits(subreddit_name, 2))
     
     # Always fetch from the primary subreddit first
     try:
         logger.info(f"Fetching posts from primary subreddit: r/{subreddit_name}")
-        primary_posts = await reddit_service.fetch_posts(subreddit_name)
+        primary_posts, primary_status = await reddit_service.fetch_posts(subreddit_name)
         
         if primary_posts:
-            for post in primary_posts:
-                if post.id not in seen_post_ids:
-                    sentiment = sentiment_service.analyze_sentiment(post.text)
-                    tech_tags = relevance_service.extract_tech_tags(post.text)
-                    importance = river_service.calculate_importance(post, sentiment, tech_tags)
-                    
-                    processed_post = Post(
-                        id=post.id,
-                        text=post.text,
-                        url=post.url,
-                        importance_score=importance,
-                        sentiment_label=sentiment.label,
-                        sentiment_score=sentiment.score,
-                        tech_tags=tech_tags,
-                        created_at=post.created_at,
-                        score=post.score,
-                        comments=post.comments,
-                        image_url=post.image_url,
-                        thumbnail_url=post.thumbnail_url,
-                        post_hint=post.post_hint,
-                        has_image=post.has_image
-                    )
-                    all_posts.append(processed_post)
-                    seen_post_ids.add(post.id)
+            all_posts.extend(await _process_posts_in_executor(
+                _take_unseen(primary_posts, seen_post_ids),
+                river_service.importance_threshold
+            ))
             
             logger.info(f"Found {len(primary_posts)} posts from r/{subreddit_name}")
     except Exception as e:
@@ -68,7 +184,7 @@ async def _fetch_from_multiple_sources(subreddit_name: str, limit: int) -> List[
     
     # Find related subreddits for additional sources
     try:
-        related_suggestions = await subreddit_search_service.search_subreddits(subreddit_name, 2)
+        related_suggestions = await related_task
         
         for suggestion in related_suggestions:
             if suggestion.name.lower() == subreddit_name.lower():
@@ -76,33 +192,13 @@ async def _fetch_from_multiple_sources(subreddit_name: str, limit: int) -> List[
                 
             try:
                 logger.info(f"Fetching posts from related subreddit: r/{suggestion.name}")
-                related_posts = await reddit_service.fetch_posts(suggestion.name)
+                related_posts, _ = await reddit_service.fetch_posts(suggestion.name)
                 
                 if related_posts:
-                    for post in related_posts:
-                        if post.id not in seen_post_ids:
-                            sentiment = sentiment_service.analyze_sentiment(post.text)
-                            tech_tags = relevance_service.extract_tech_tags(post.text)
-                            importance = river_service.calculate_importance(post, sentiment, tech_tags)
-                            
-                            processed_post = Post(
-                                id=post.id,
-                                text=post.text,
-                                url=post.url,
-                                importance_score=importance,
-                                sentiment_label=sentiment.label,
-                                sentiment_score=sentiment.score,
-                                tech_tags=tech_tags,
-                                created_at=post.created_at,
-                                score=post.score,
-                                comments=post.comments,
-                                image_url=post.image_url,
-                                thumbnail_url=post.thumbnail_url,
-                                post_hint=post.post_hint,
-                                has_image=post.has_image
-                            )
-                            all_posts.append(processed_post)
-                            seen_post_ids.add(post.id)
+                    all_posts.extend(await _process_posts_in_executor(
+                        _take_unseen(related_posts, seen_post_ids),
+                        river_service.importance_threshold
+                    ))
                     
                     logger.info(f"Found {len(related_posts)} posts from r/{suggestion.name}")
                     
@@ -118,13 +214,11 @@ async def _fetch_from_multiple_sources(subreddit_name: str, limit: int) -> List[
         logger.warning(f"Error finding related subreddits: {str(e)}")
     
     if all_posts:
-        # Sort by importance and return top posts
-        all_posts.sort(key=lambda x: x.importance_score, reverse=True)
         logger.info(f"Multi-source search found {len(all_posts)} total posts from {len(seen_post_ids)} unique posts")
-        return all_posts
+        return all_posts, primary_status, True
     else:
         logger.info(f"No posts found from any sources for subreddit: {subreddit_name}")
-        return []
+        return [], primary_status, bool(seen_post_ids)
 
 async def _try_fallback_search(query: str, limit: int) -> List[Post]:
     """
@@ -151,32 +245,11 @@ async def _try_fallback_search(query: str, limit: int) -> List[Post]:
         for suggestion in suggestions:
             try:
                 logger.info(f"Trying fallback subreddit: r/{suggestion.name}")
-                posts = await reddit_service.fetch_posts(suggestion.name)
+                posts, _ = await reddit_service.fetch_posts(suggestion.name)
                 
                 if posts:
                     # Process posts for this subreddit
-                    for post in posts:
-                        sentiment = sentiment_service.analyze_sentiment(post.text)
-                        tech_tags = relevance_service.extract_tech_tags(post.text)
-                        importance = river_service.calculate_importance(post, sentiment, tech_tags)
-                        
-                        processed_post = Post(
-                            id=post.id,
-                            text=post.text,
-                            url=post.url,
-                            importance_score=importance,
-                            sentiment_label=sentiment.label,
-                            sentiment_score=sentiment.score,
-                            tech_tags=tech_tags,
-                            created_at=post.created_at,
-                            score=post.score,
-                            comments=post.comments,
-                            image_url=post.image_url,
-                            thumbnail_url=post.thumbnail_url,
-                            post_hint=post.post_hint,
-                            has_image=post.has_image
-                        )
-                        all_posts.append(processed_post)
+                    all_posts.extend(await _process_posts_in_executor(posts))
                     
                     logger.info(f"Found {len(posts)} posts from r/{suggestion.name}")
                     
@@ -201,28 +274,95 @@ async def _try_fallback_search(query: str, limit: int) -> List[Post]:
         logger.error(f"Error in fallback search for {query}: {str(e)}")
         return []
 
-async def _is_subreddit_not_found(subreddit_name: str) -> bool:
-    """Check if a subreddit exists by making a lightweight request"""
-    try:
-        url = f"https://www.reddit.com/r/{subreddit_name}/about.json"
-        headers = {"User-Agent": "TechRelevanceAnalyzer/1.0 (Educational Purpose)"}
+async def _load_river(cache_key: CacheKey, subreddit_name: str) -> Tuple[List[Post], str]:
+    """
+    Fetch, score and cache posts for a subreddit that missed the cache
+    
+    The result is shared by every caller coalesced onto cache_key, whatever
+    limit each asked for, so it is built for the largest allowed limit and
+    callers slice their own.
+    
+    Args:
+        cache_key: Key to store the filtered posts under
+        subreddit_name: Validated subreddit name
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 404:
-                    return True  # Subreddit not found
-                elif response.status == 200:
-                    data = await response.json()
-                    # Check if subreddit is private/banned
-                    if data.get('data', {}).get('over18') is None and not data.get('data'):
-                        return True
-                    return False  # Subreddit exists
-                else:
-                    # For other errors, assume it might exist
-                    return False
-    except Exception as e:
-        logger.warning(f"Error checking subreddit existence for {subreddit_name}: {str(e)}")
-        return False  # Assume it exists on error
+    Returns:
+        Tuple of (posts sorted by importance, search method used)
+    """
+    max_posts = API_CONFIG['max_posts_per_request']
+    
+    # Fetch fresh data using multi-source aggregation
+    logger.info(f"Fetching posts from multiple sources for r/{subreddit_name}")
+    multi_source_posts, primary_status, fetched_any = await _fetch_from_multiple_sources(subreddit_name, max_posts)
+    
+    # Posts below the importance threshold were already dropped, so when any source
+    # returned posts and none were left, serve an empty feed rather than a 404
+    if not fetched_any:
+        # Distinguish a subreddit not found error from an empty subreddit
+        if primary_status == "not_found":
+            logger.info(f"Subreddit r/{subreddit_name} not found, trying fallback search")
+            
+            # Try fallback search
+            fallback_posts = await _try_fallback_search(subreddit_name, max_posts)
+            if fallback_posts:
+                return fallback_posts, "fallback"
+            else:
+                # If no fallback results, provide suggestions
+                suggestions = await subreddit_search_service.search_subreddits(subreddit_name, 5)
+                suggestion_names = [s.name for s in suggestions]
+                
+                raise HTTPException(
+                    status_code=404, 
+                    detail=f"Subreddit '{subreddit_name}' not found. Try one of these related subreddits: {', '.join(suggestion_names)}",
+                    headers={"X-Error-Type": "subreddit_not_found_with_suggestions"}
+                )
+        else:
+            logger.info(f"No posts found in subreddit r/{subreddit_name}")
+            raise HTTPException(
+                status_code=404, 
+                detail=f"No posts found for subreddit '{subreddit_name}'. The subreddit may exist but have no recent posts.",
+                headers={"X-Error-Type": "no_posts_found"}
+            )
+    
+    # Keep the most important posts any request limit can ask for, without a full sort
+    filtered_posts = heapq.nlargest(
+        max_posts,
+        multi_source_posts,
+        key=lambda post: post.importance_score
+    )
+    
+    # Cache the results
+    await cache.store(cache_key, filtered_posts)
+    
+    return filtered_posts, "multi_source"
+
+def _conditional_response(request: Request, response: Response, river: RiverResponse):
+    """
+    Tag a river response with an ETag and answer 304 if the client already has it
+    
+    Args:
+        request: Incoming request, checked for If-None-Match
+        response: Outgoing response to set caching headers on
+        river: River feed about to be returned
+        
+    Returns:
+        The river feed, or an empty 304 response when the client copy is current
+    """
+    fingerprint = orjson.dumps([
+        (post.id, post.importance_score, post.score, post.comments) for post in river.posts
+    ])
+    etag = f'W/"{xxhash.xxh64_hexdigest(fingerprint)}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={cache.ttl}"}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Weak comparison: ignore W/ prefixes on either side
+        client_tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in client_tags or etag.removeprefix("W/") in client_tags:
+            return Response(status_code=304, headers=headers)
+    
+    response.headers.update(headers)
+    return river
 
 def validate_subreddit(name: str) -> str:
     """Validate and sanitize subreddit name"""
@@ -233,24 +373,44 @@ def validate_subreddit(name: str) -> str:
     sanitized = name.strip().lower()
     
     # Validate format (alphanumeric, underscores, hyphens only, max 21 chars)
-    if not re.match(r'^[a-z0-9_-]{1,21}$', sanitized):
+    if not _SUBREDDIT_NAME_RE.match(sanitized):
         raise HTTPException(
             status_code=400, 
             detail="Invalid subreddit name. Must be 1-21 characters, alphanumeric, underscores, or hyphens only"
         )
     
     # Block reserved/invalid names
-    reserved_names = {'www', 'api', 'blog', 'help', 'info', 'mod', 'moderators', 'i', 'me', 'r'}
-    if sanitized in reserved_names:
+    if sanitized in _RESERVED_SUBREDDITS:
         raise HTTPException(status_code=400, detail=f"'{sanitized}' is a reserved subreddit name")
     
     return sanitized
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared HTTP session and post-processing pool, and release them on shutdown"""
+    app.state.executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+    app.state.http = aiohttp.ClientSession(
+        headers={"User-Agent": reddit_service.user_agent},
+        connector=aiohttp.TCPConnector(
+            limit=API_CONFIG['http_pool_size'],
+            ttl_dns_cache=300
+        )
+    )
+    reddit_service.session = app.state.http
+    subreddit_search_service.session = app.state.http
+    
+    yield
+    
+    await app.state.http.close()
+    await cache.close()
+    app.state.executor.shutdown(wait=False)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Tech Relevance & Sentiment Analyzer",
     description="Analyzes technology relevance and sentiment from Reddit sources",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -263,10 +423,10 @@ app.add_middleware(
 )
 
 # Initialize services
-cache = Cache()
+cache = Cache(backend=RedisBackend(API_CONFIG['redis_url']) if API_CONFIG['redis_url'] else None)
 reddit_service = RedditService()
 sentiment_service = SentimentService()
-relevance_service = RelevanceService()
+relevance_service = get_relevance_service()
 river_service = RiverService()
 subreddit_search_service = SubredditSearchService()
 
@@ -290,23 +450,7 @@ async def proxy_image(url: str = Query(...)):
         # Log the URL for debugging
         logger.info(f"Proxying image: {url}")
         
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate, br",
-            "DNT": "1",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-            "Sec-Fetch-Dest": "image",
-            "Sec-Fetch-Mode": "no-cors",
-            "Sec-Fetch-Site": "cross-site",
-            "Referer": "https://www.reddit.com/"
-        }
-        
-        timeout = aiohttp.ClientTimeout(total=30)
-        
-        async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
+        async with aiohttp.ClientSession(headers=_IMAGE_PROXY_HEADERS, timeout=_IMAGE_PROXY_TIMEOUT) as session:
             async with session.get(url) as response:
                 logger.info(f"Image response status: {response.status}")
                 
@@ -338,6 +482,8 @@ async def proxy_image(url: str = Query(...)):
 
 @app.get("/api/river", response_model=RiverResponse)
 async def get_river(
+    request: Request,
+    response: Response,
     source: str = "reddit",
     name: str = "technology",
     limit: int = 50
@@ -365,62 +511,28 @@ async def get_river(
     
     try:
         # Check cache first
-        cache_key = f"{source}:{validated_name}"
-        cached_posts = cache.get(cache_key)
+        cache_key = (source, validated_name)
+        cached_posts = await cache.fetch(cache_key)
         
         if cached_posts:
             logger.info(f"Returning cached posts for {cache_key}")
-            return RiverResponse(posts=cached_posts[:limit], source=source, name=validated_name)
-        
-        # Fetch fresh data using multi-source aggregation
-        logger.info(f"Fetching posts from multiple sources for r/{validated_name}")
-        multi_source_posts = await _fetch_from_multiple_sources(validated_name, limit)
-        
-        if not multi_source_posts:
-            # Check if this is a subreddit not found error vs empty subreddit
-            if await _is_subreddit_not_found(validated_name):
-                logger.info(f"Subreddit r/{validated_name} not found, trying fallback search")
-                
-                # Try fallback search
-                fallback_posts = await _try_fallback_search(validated_name, limit)
-                if fallback_posts:
-                    return RiverResponse(
-                        posts=fallback_posts[:limit], 
-                        source=source, 
-                        name=validated_name,
-                        search_method="fallback"
-                    )
-                else:
-                    # If no fallback results, provide suggestions
-                    suggestions = await subreddit_search_service.search_subreddits(validated_name, 5)
-                    suggestion_names = [s.name for s in suggestions]
-                    
-                    raise HTTPException(
-                        status_code=404, 
-                        detail=f"Subreddit '{validated_name}' not found. Try one of these related subreddits: {', '.join(suggestion_names)}",
-                        headers={"X-Error-Type": "subreddit_not_found_with_suggestions"}
-                    )
-            else:
-                logger.info(f"No posts found in subreddit r/{validated_name}")
-                raise HTTPException(
-                    status_code=404, 
-                    detail=f"No posts found for subreddit '{validated_name}'. The subreddit may exist but have no recent posts.",
-                    headers={"X-Error-Type": "no_posts_found"}
-                )
-        
-        # Filter by importance threshold and sort
-        filtered_posts = river_service.filter_and_sort(multi_source_posts)
+            river = RiverResponse.model_construct(posts=cached_posts[:limit], source=source, name=validated_name)
+            return _conditional_response(request, response, river)
         
-        # Cache the results
-        cache.set(cache_key, filtered_posts)
+        # Concurrent misses for the same key share a single fetch
+        posts, search_method = await _coalesce(cache_key, _load_river, cache_key, validated_name)
         
-        return RiverResponse(
-            posts=filtered_posts[:limit],
+        river = RiverResponse.model_construct(
+            posts=posts[:limit],
             source=source,
             name=validated_name,
-            search_method="multi_source"
+            search_method=search_method
         )
+        return _conditional_response(request, response, river)
         
+    except HTTPException:
+        # Not-found and validation errors carry their own status codes
+        raise
     except Exception as e:
         logger.error(f"Error processing river request: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
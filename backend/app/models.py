@@ -14,6 +14,7 @@ class RedditPost(BaseModel):
     text: str  # Combined title + body
     url: str
     created_at: datetime
+    created_ts: Optional[float] = None  # Unix creation time (created_utc)
     score: int
     comments: int
     author: str
@@ -1,58 +1,100 @@
 import aiohttp
 import asyncio
-from typing import List, Optional
+from typing import List, Literal, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
-import hashlib
+import orjson
+import xxhash
+from aiolimiter import AsyncLimiter
 
 from ..models import RedditPost
+from ..utils.config import API_CONFIG
+from ..utils.http_client import RedditHTTPClient
 from ..utils.text_processing import TextProcessor
 
 logger = logging.getLogger(__name__)
 
-class RedditService:
+# Outcome of a subreddit listing fetch
+FetchStatus = Literal["ok", "not_found", "empty"]
+
+class RedditService(RedditHTTPClient):
     """Service for fetching and processing Reddit posts"""
     
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        super().__init__(session)
         self.base_url = "https://www.reddit.com"
-        self.user_agent = "TechRelevanceAnalyzer/1.0 (Educational Purpose)"
-        self.rate_limit_delay = 2.0  # seconds between requests
-        self.last_request_time = None
+        # Token bucket for Reddit's per-minute allowance, plus a cap on in-flight requests
+        self.limiter = AsyncLimiter(API_CONFIG['reddit_requests_per_minute'], 60)
+        # Created on first request: before Python 3.10 a semaphore binds to the loop
+        # current at construction, and this service is built at import time
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.max_retries = 3  # attempts after a 429 before giving up
+        self.max_retry_delay = 60.0  # longest wait between attempts, in seconds
         self.text_processor = TextProcessor()
     
-    async def _make_request(self, url: str) -> Optional[dict]:
-        """Make HTTP request with rate limiting and error handling"""
-        # Rate limiting
-        if self.last_request_time:
-            elapsed = datetime.now().timestamp() - self.last_request_time
-            if elapsed < self.rate_limit_delay:
-                await asyncio.sleep(self.rate_limit_delay - elapsed)
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Return the in-flight request cap, creating it inside the running loop"""
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(API_CONFIG['reddit_max_concurrency'])
+        return self.semaphore
+    
+    async def _make_request(self, url: str, allow_redirects: bool = True) -> Tuple[Optional[int], Optional[dict]]:
+        """
+        Make HTTP request with rate limiting and error handling
         
-        headers = {
-            "User-Agent": self.user_agent
-        }
+        Returns:
+            Tuple of (HTTP status or None on connection error, parsed JSON on 200)
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.limiter, self._get_semaphore():
+                    session = self._get_session()
+                    async with session.get(url, headers=self.request_headers, allow_redirects=allow_redirects) as response:
+                        if response.status == 200:
+                            return response.status, orjson.loads(await response.read())
+                        elif response.status in (301, 302, 404):
+                            # Unknown subreddits answer 404 or, unfollowed, a redirect to search
+                            logger.warning(f"Subreddit not found (HTTP {response.status}): {url}")
+                            return response.status, None
+                        elif response.status == 429:
+                            delay = self._retry_delay(response, attempt)
+                            if delay is None:
+                                logger.error(f"Rate limited with a Retry-After beyond {self.max_retry_delay:.0f}s: {url}")
+                                return response.status, None
+                        else:
+                            logger.error(f"HTTP {response.status}: {url}")
+                            return response.status, None
+                            
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.error(f"Error fetching {url}: {str(e)}")
+                return None, None
+            
+            # Back off outside the limiter so other requests are not held up
+            if attempt < self.max_retries:
+                logger.warning(f"Rate limited, retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
         
-        try:
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.get(url) as response:
-                    self.last_request_time = datetime.now().timestamp()
-                    
-                    if response.status == 200:
-                        return await response.json()
-                    elif response.status == 404:
-                        logger.warning(f"Subreddit not found: {url}")
-                        return None
-                    elif response.status == 429:
-                        logger.warning("Rate limited, waiting...")
-                        await asyncio.sleep(5)
-                        return await self._make_request(url)
-                    else:
-                        logger.error(f"HTTP {response.status}: {url}")
-                        return None
-                        
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {str(e)}")
-            return None
+        logger.error(f"Still rate limited after {self.max_retries} retries: {url}")
+        return 429, None
+    
+    def _retry_delay(self, response: aiohttp.ClientResponse, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait after a 429, honouring Retry-After when Reddit sends one
+        
+        Returns:
+            Delay capped at max_retry_delay, or None when Retry-After asks for longer
+        """
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                delay = max(float(retry_after), 0.0)
+            except ValueError:
+                pass  # HTTP-date form, fall back to exponential backoff
+            else:
+                # Waiting longer would stall every request coalesced onto this fetch
+                return delay if delay <= self.max_retry_delay else None
+        
+        return min(5.0 * 2 ** attempt, self.max_retry_delay)
     
     def _parse_reddit_post(self, post_data: dict, subreddit: str) -> Optional[RedditPost]:
         """Parse raw Reddit post data into RedditPost model"""
@@ -116,13 +158,16 @@ class RedditService:
             # Create combined text for analysis
             combined_text = self.text_processor.combine_title_body(title, body)
             
+            created_ts = float(data.get("created_utc", 0))
+            
             # Create RedditPost object
             reddit_post = RedditPost(
                 id=post_id,
                 title=title,
                 text=combined_text,
                 url=f"https://reddit.com{data.get('permalink', '')}",
-                created_at=datetime.fromtimestamp(data.get("created_utc", 0)),
+                created_at=datetime.fromtimestamp(created_ts),
+                created_ts=created_ts,
                 score=data.get("score", 0),
                 comments=data.get("num_comments", 0),
                 author=data.get("author", ""),
@@ -136,11 +181,11 @@ class RedditService:
             logger.info(f"Successfully parsed post: {post_id} - {title[:50]} (has_image: {has_image})")
             return reddit_post
             
-        except Exception as e:
+        except (KeyError, TypeError, ValueError, AttributeError, OverflowError, OSError) as e:
             logger.error(f"Error parsing Reddit post: {str(e)}")
             return None
     
-    async def fetch_posts(self, subreddit: str, limit: int = 100) -> List[RedditPost]:
+    async def fetch_posts(self, subreddit: str, limit: int = 100) -> Tuple[List[RedditPost], FetchStatus]:
         """
         Fetch latest posts from a subreddit
         
@@ -149,18 +194,25 @@ class RedditService:
             limit: Maximum number of posts to fetch
             
         Returns:
-            List of RedditPost objects
+            Tuple of (RedditPost objects, fetch status). The status is "not_found"
+            when the subreddit does not exist, so callers need no extra lookup.
         """
         url = f"{self.base_url}/r/{subreddit}/new.json?limit={limit}"
         
         logger.info(f"Fetching posts from r/{subreddit}")
-        response_data = await self._make_request(url)
+        # Reddit redirects unknown subreddits to search, so treat a redirect as not found
+        status, response_data = await self._make_request(url, allow_redirects=False)
+        
+        if status in (301, 302, 404):
+            return [], "not_found"
         
         if not response_data:
-            return []
+            return [], "empty"
         
         posts = []
-        seen_hashes = set()  # For deduplication
+        # Deduplicate by post ID first (no hashing), then by content for reposts
+        seen_ids: set[str] = set()
+        seen_hashes: set[int] = set()
         
         try:
             # Extract posts from response
@@ -182,24 +234,30 @@ class RedditService:
                     continue
                 
                 # Skip posts with no ID or title
-                if not post_data.get("id") or not post_data.get("title"):
+                post_id = post_data.get("id")
+                if not post_id or not post_data.get("title"):
                     continue
                 
+                # Skip repeated IDs before paying for parsing
+                if post_id in seen_ids:
+                    continue
+                seen_ids.add(post_id)
+                
                 reddit_post = self._parse_reddit_post(post_data, subreddit)
                 
                 if reddit_post:
-                    # Deduplicate by content hash
-                    content_hash = hashlib.md5(
-                        reddit_post.text.encode('utf-8')
-                    ).hexdigest()
+                    # Deduplicate by content hash (integer key, no hex string)
+                    content_hash = xxhash.xxh64_intdigest(reddit_post.text.encode('utf-8'))
+                    
+                    if content_hash in seen_hashes:
+                        continue
+                    seen_hashes.add(content_hash)
                     
-                    if content_hash not in seen_hashes:
-                        seen_hashes.add(content_hash)
-                        posts.append(reddit_post)
+                    posts.append(reddit_post)
             
             logger.info(f"Successfully fetched {len(posts)} posts from r/{subreddit}")
-            return posts
+            return posts, "ok" if posts else "empty"
             
         except Exception as e:
             logger.error(f"Error processing Reddit response: {str(e)}")
-            return []
+            return [], "empty"
@@ -1,49 +1,127 @@
-import re
-from typing import List, Set
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Set, Tuple
 import logging
+import sys
 
-from ..utils.config import TECH_KEYWORDS
+import ahocorasick
+
+from ..utils.config import TECH_KEYWORDS, API_CONFIG
 
 logger = logging.getLogger(__name__)
 
+def _is_word_char(char: str) -> bool:
+    """Match the regex \\w class: Unicode letters, digits and underscore"""
+    return char.isalnum() or char == '_'
+
+def _at_word_boundary(text: str, index: int) -> bool:
+    """Check for a regex \\b word boundary between text[index - 1] and text[index]"""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
 class RelevanceService:
     """Service for detecting technology relevance in text"""
     
     def __init__(self):
-        # Compile regex patterns for better performance
-        self.keyword_patterns = {}
+        # Single Aho-Corasick automaton over every keyword, so each text is
+        # scanned once regardless of how many categories there are
+        keyword_categories: Dict[str, List[str]] = defaultdict(list)
         for category, keywords in TECH_KEYWORDS.items():
-            # Create regex pattern for each category
-            pattern = r'\b(?:' + '|'.join(map(re.escape, keywords)) + r')\b'
-            self.keyword_patterns[category] = re.compile(pattern, re.IGNORECASE)
+            for keyword in keywords:
+                # Interned so every tag list shares one string per keyword
+                keyword_categories[sys.intern(keyword.lower())].append(category)
+        
+        self.automaton = ahocorasick.Automaton()
+        for keyword, categories in keyword_categories.items():
+            self.automaton.add_word(keyword, (keyword, tuple(categories)))
+        self.automaton.make_automaton()
+        
+        # Categories that earn a relevance bonus, limited to ones that exist
+        self.high_value_categories = tuple(
+            category for category in ('ai_ml', 'frameworks', 'languages')
+            if category in TECH_KEYWORDS
+        )
+        
+        # Per-text memo of scan results, shared by every public method
+        self._scan = lru_cache(maxsize=API_CONFIG['analysis_cache_size'])(self._scan_uncached)
+        self._tags = lru_cache(maxsize=API_CONFIG['analysis_cache_size'])(self._tags_uncached)
     
-    def extract_tech_tags(self, text: str) -> List[str]:
+    def clear_cache(self) -> None:
+        """Drop memoized scan results"""
+        self._scan.cache_clear()
+        self._tags.cache_clear()
+    
+    def _scan_uncached(self, text: str) -> Dict[str, FrozenSet[str]]:
         """
-        Extract technology keywords from text and return as tags
+        Find all whole-word keyword matches in text, grouped by category
+        
+        Results are memoized through self._scan and shared between callers,
+        so they must be treated as read-only.
         
         Args:
             text: Input text to analyze
             
         Returns:
-            List of detected technology tags
+            Dictionary mapping category to the set of keywords found
         """
+        distribution: Dict[str, Set[str]] = defaultdict(set)
         if not text:
-            return []
+            return {}
         
-        detected_tags = set()
         text_lower = text.lower()
         
-        # Check each category for keyword matches
-        for category, pattern in self.keyword_patterns.items():
-            matches = pattern.findall(text_lower)
-            for match in matches:
-                # Normalize the match and add as tag
-                tag = match.lower().strip()
-                if tag and len(tag) > 1:  # Filter out single characters
-                    detected_tags.add(tag)
-        
-        # Convert to sorted list for consistency
-        return sorted(list(detected_tags))
+        for end_index, (keyword, categories) in self.automaton.iter(text_lower):
+            start_index = end_index - len(keyword) + 1
+            # Same whole-word rule as the \b...\b keyword regexes
+            if not (_at_word_boundary(text_lower, start_index) and _at_word_boundary(text_lower, end_index + 1)):
+                continue
+            for category in categories:
+                distribution[category].add(keyword)
+        
+        return {category: frozenset(matches) for category, matches in distribution.items()}
+    
+    def _tags_uncached(self, text: str) -> Tuple[str, ...]:
+        """
+        Collect the sorted multi-character tags for text
+        
+        Args:
+            text: Input text to analyze
+            
+        Returns:
+            Sorted tuple of unique tags, memoized through self._tags
+        """
+        detected_tags = set()
+        for matches in self._scan(text).values():
+            detected_tags.update(matches)
+        
+        # Filter out single characters and sort for consistency
+        return tuple(sorted(tag for tag in detected_tags if len(tag) > 1))
+    
+    def extract_tech_tags(self, text: str) -> List[str]:
+        """
+        Extract technology keywords from text and return as tags
+        
+        Args:
+            text: Input text to analyze
+            
+        Returns:
+            List of detected technology tags
+        """
+        return list(self._tags(text))
+    
+    def extract_tech_tags_batch(self, texts: List[str]) -> List[List[str]]:
+        """
+        Extract technology tags from many texts in one call
+        
+        Args:
+            texts: Input texts to analyze
+            
+        Returns:
+            List of detected technology tags for each text, in input order
+        """
+        extract = self.extract_tech_tags
+        return [extract(text) for text in texts]
     
     def calculate_tech_relevance_score(self, text: str) -> float:
         """
@@ -55,23 +133,23 @@ class RelevanceService:
         Returns:
             Relevance score (0.0 to 1.0)
         """
-        tags = self.extract_tech_tags(text)
+        # One scan serves both the tag count and the category bonus
+        distribution = self._scan(text)
+        tag_count = len(self._tags(text))
         
-        if not tags:
+        if not tag_count:
             return 0.0
         
         # Base score from number of unique tags
-        base_score = min(len(tags) / 10.0, 1.0)  # Cap at 10 unique tags
+        base_score = min(tag_count / 10.0, 1.0)  # Cap at 10 unique tags
         
         # Bonus for high-value categories (AI/ML, frameworks)
-        high_value_categories = ['ai_ml', 'frameworks', 'languages']
         bonus = 0.0
         
-        for category, pattern in self.keyword_patterns.items():
-            if category in high_value_categories:
-                matches = pattern.findall(text.lower())
-                if matches:
-                    bonus += 0.1 * min(len(set(matches)), 3)  # Cap bonus per category
+        for category in self.high_value_categories:
+            matches = distribution.get(category)
+            if matches:
+                bonus += 0.1 * min(len(matches), 3)  # Cap bonus per category
         
         # Cap total score at 1.0
         return min(base_score + bonus, 1.0)
@@ -86,16 +164,10 @@ class RelevanceService:
         Returns:
             Dictionary with category counts
         """
-        distribution = {}
-        text_lower = text.lower()
-        
-        for category, pattern in self.keyword_patterns.items():
-            matches = pattern.findall(text_lower)
-            unique_matches = set(matches)
-            if unique_matches:
-                distribution[category] = list(unique_matches)
-        
-        return distribution
+        return {
+            category: list(matches)
+            for category, matches in self._scan(text).items()
+        }
     
     def is_tech_focused(self, text: str, threshold: float = 0.3) -> bool:
         """
@@ -109,3 +181,8 @@ class RelevanceService:
             True if text is tech-focused
         """
         return self.calculate_tech_relevance_score(text) >= threshold
+
+@lru_cache(maxsize=None)
+def get_relevance_service() -> RelevanceService:
+    """Return the process-wide RelevanceService, building its automaton on first use"""
+    return RelevanceService()
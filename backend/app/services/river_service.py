@@ -1,27 +1,53 @@
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
+import heapq
 import math
 import logging
+import time
+
+import numpy as np
 
 from ..models import Post, RedditPost, SentimentResult
 from ..utils.config import IMPORTANCE_WEIGHTS, API_CONFIG
-from .relevance_service import RelevanceService
+from .relevance_service import get_relevance_service
 
 logger = logging.getLogger(__name__)
 
+# Combined engagement values below this are served from a precomputed table
+ENGAGEMENT_LUT_SIZE = 1024
+
+# Knots of the piecewise-linear recency decay in _calculate_recency_score
+# (age in hours -> score); the curve is flat outside the first and last knot
+RECENCY_KNOT_HOURS = np.array([6.0, 24.0, 72.0, 168.0, 888.0])
+RECENCY_KNOT_SCORES = np.array([1.0, 0.7, 0.4, 0.2, 0.1])
+
 class RiverService:
     """Service for calculating importance scores and filtering river feed"""
     
     def __init__(self):
         self.weights = IMPORTANCE_WEIGHTS
+        # Weights unpacked once so scoring does not index the dict per post
+        self._engagement_weight = self.weights['engagement_weight']
+        self._recency_weight = self.weights['recency_weight']
+        self._tech_relevance_weight = self.weights['tech_relevance_weight']
+        self._sentiment_weight = self.weights['sentiment_weight']
         self.importance_threshold = API_CONFIG['importance_threshold']
-        self.relevance_service = RelevanceService()
+        self.relevance_service = get_relevance_service()
+        
+        # Engagement tiers for every small combined engagement value; the tuple
+        # serves scalar lookups, the array serves batch lookups
+        self._engagement_lut = np.array(
+            [self._engagement_tier(value) for value in range(ENGAGEMENT_LUT_SIZE)],
+            dtype=np.float64
+        )
+        self._engagement_lut_values = tuple(self._engagement_lut.tolist())
     
     def calculate_importance(
         self, 
         post: RedditPost, 
         sentiment: SentimentResult, 
-        tech_tags: List[str]
+        tech_tags: List[str],
+        now: Optional[datetime] = None
     ) -> float:
         """
         Calculate importance score for a post
@@ -30,67 +56,174 @@ class RiverService:
             post: RedditPost object
             sentiment: SentimentResult object
             tech_tags: List of detected tech tags
+            now: Reference time for recency; pass one value when scoring a batch
             
         Returns:
             Importance score (0.0 to 1.0)
         """
-        try:
-            # 1. Engagement score (score + comments)
-            engagement_score = self._calculate_engagement_score(post.score, post.comments)
-            
-            # 2. Recency score (newer posts get higher weight)
-            recency_score = self._calculate_recency_score(post.created_at)
-            
-            # 3. Tech relevance score (presence of tech keywords)
-            tech_relevance_score = self._calculate_tech_relevance_score(tech_tags)
-            
-            # 4. Sentiment score (positive sentiment gets bonus)
-            sentiment_score = self._calculate_sentiment_score(sentiment)
-            
-            # Combine scores using weights
-            importance = (
-                engagement_score * self.weights['engagement_weight'] +
-                recency_score * self.weights['recency_weight'] +
-                tech_relevance_score * self.weights['tech_relevance_weight'] +
-                sentiment_score * self.weights['sentiment_weight']
-            )
-            
-            # Normalize to 0-1 range
-            return min(max(importance, 0.0), 1.0)
-            
-        except Exception as e:
-            logger.error(f"Error calculating importance score: {str(e)}")
-            return 0.0
+        # 1. Engagement score (score + comments)
+        engagement_score = self._calculate_engagement_score(post.score, post.comments)
+        
+        # 2. Recency score (newer posts get higher weight)
+        recency_score = self._calculate_recency_score(post.created_at, now)
+        
+        # 3. Tech relevance score (presence of tech keywords)
+        tech_relevance_score = self._calculate_tech_relevance_score(tech_tags)
+        
+        # 4. Sentiment score (positive sentiment gets bonus)
+        sentiment_score = self._calculate_sentiment_score(sentiment)
+        
+        # Combine scores using weights
+        importance = (
+            engagement_score * self._engagement_weight +
+            recency_score * self._recency_weight +
+            tech_relevance_score * self._tech_relevance_weight +
+            sentiment_score * self._sentiment_weight
+        )
+        
+        # Normalize to 0-1 range
+        return min(max(importance, 0.0), 1.0)
     
-    def _calculate_engagement_score(self, score: int, comments: int) -> float:
+    def calculate_importance_batch(
+        self,
+        posts: List[RedditPost],
+        sentiments: List[SentimentResult],
+        tech_tags_list: List[List[str]],
+        now: Optional[datetime] = None
+    ) -> np.ndarray:
         """
-        Calculate engagement score from Reddit score and comments
-        Uses logarithmic scaling to prevent very high scores from dominating
-        Comments weighted more heavily to indicate discussion quality
+        Calculate importance scores for many posts at once
+        
+        Evaluates the same piecewise formulas as calculate_importance, but as
+        array operations over the whole batch.
+        
+        Args:
+            posts: RedditPost objects
+            sentiments: SentimentResult for each post
+            tech_tags_list: Detected tech tags for each post
+            now: Reference time for recency (defaults to the current time)
+            
+        Returns:
+            Array of importance scores (0.0 to 1.0), in input order
         """
-        # Combine score and comments (comments weighted more heavily - increased from 2x to 3x)
-        combined_engagement = score + (comments * 3)
+        count = len(posts)
+        if count == 0:
+            return np.empty(0, dtype=np.float64)
+        
+        scores = np.fromiter((post.score for post in posts), dtype=np.float64, count=count)
+        comments = np.fromiter((post.comments for post in posts), dtype=np.float64, count=count)
+        tag_counts = np.fromiter((len(tags) for tags in tech_tags_list), dtype=np.int64, count=count)
+        sentiment_scores = np.fromiter((s.score for s in sentiments), dtype=np.float64, count=count)
+        labels = [s.label for s in sentiments]
+        is_positive = np.fromiter((label == "positive" for label in labels), dtype=bool, count=count)
+        is_negative = np.fromiter((label == "negative" for label in labels), dtype=bool, count=count)
+        
+        # 1. Engagement score (see _calculate_engagement_score)
+        combined = (scores + comments * 3).astype(np.int64)
+        engagement = np.where(
+            combined < ENGAGEMENT_LUT_SIZE,
+            self._engagement_lut[np.clip(combined, 0, ENGAGEMENT_LUT_SIZE - 1)],
+            np.minimum(0.95 + (np.log10(np.maximum(combined, 1)) / 8.0) * 0.05, 1.0)
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            discussion_heavy = (scores > 0) & (comments / np.where(scores > 0, scores, 1) > 2.0)
+        engagement = np.where(
+            discussion_heavy & (combined > 0),
+            np.minimum(engagement + 0.05, 1.0),
+            engagement
+        )
+        
+        # 2. Recency score (see _calculate_recency_score), from epoch seconds
+        now_ts = time.time() if now is None else now.timestamp()
+        created_ts = np.fromiter(
+            (
+                post.created_at.timestamp() if post.created_ts is None else post.created_ts
+                for post in posts
+            ),
+            dtype=np.float64,
+            count=count
+        )
+        recency = self._recency_from_age_hours((now_ts - created_ts) * (1 / 3600))
         
+        # 3. Tech relevance score (see _calculate_tech_relevance_score)
+        tag_score = np.select(
+            [tag_counts == 1, tag_counts == 2, tag_counts == 3, tag_counts <= 5],
+            [0.3, 0.5, 0.7, 0.85],
+            1.0
+        )
+        tech_relevance = np.where(tag_counts == 0, 0.05, np.maximum(tag_score * 0.8, 0.1))
+        
+        # 4. Sentiment score (see _calculate_sentiment_score)
+        sentiment_component = np.select(
+            [is_positive, is_negative],
+            [np.minimum(np.abs(sentiment_scores) * 0.3, 0.3), np.maximum(-0.1, sentiment_scores * 0.1)],
+            0.0
+        )
+        
+        # Combine scores using weights
+        importance = (
+            engagement * self._engagement_weight +
+            recency * self._recency_weight +
+            tech_relevance * self._tech_relevance_weight +
+            sentiment_component * self._sentiment_weight
+        )
+        
+        # Normalize to 0-1 range
+        return np.clip(importance, 0.0, 1.0)
+    
+    @staticmethod
+    def _engagement_tier(combined_engagement: int) -> float:
+        """
+        Map combined engagement onto the tiered 0-1 engagement scale
+        
+        Args:
+            combined_engagement: Reddit score plus weighted comment count
+            
+        Returns:
+            Engagement score before the discussion bonus
+        """
         if combined_engagement <= 0:
             # Give small base score for new posts with 0 engagement
             return 0.1
         
-        # Logarithmic scaling with base 10, but with a minimum score
-        log_score = math.log10(max(combined_engagement, 1))
-        
         # Normalize to 0-1 range with better scaling for low engagement
         if combined_engagement <= 5:
             # Give reasonable scores for very low engagement (1-5)
-            normalized_score = 0.1 + (combined_engagement / 5.0) * 0.3
+            return 0.1 + (combined_engagement / 5.0) * 0.3
         elif combined_engagement <= 50:
             # Medium engagement
-            normalized_score = 0.4 + ((combined_engagement - 5) / 45.0) * 0.4
+            return 0.4 + ((combined_engagement - 5) / 45.0) * 0.4
         elif combined_engagement <= 200:
             # High engagement - improved scaling
-            normalized_score = 0.8 + ((combined_engagement - 50) / 150.0) * 0.15
+            return 0.8 + ((combined_engagement - 50) / 150.0) * 0.15
         else:
             # Very high engagement - use log scaling with better discrimination
-            normalized_score = min(0.95 + (log_score / 8.0) * 0.05, 1.0)
+            return min(0.95 + (math.log10(combined_engagement) / 8.0) * 0.05, 1.0)
+    
+    @staticmethod
+    def _recency_from_age_hours(age_hours: np.ndarray) -> np.ndarray:
+        """Apply the tiered recency decay of _calculate_recency_score to an array of ages"""
+        # The tiers are continuous and linear between knots, so one
+        # interpolation reproduces them without evaluating every branch
+        return np.interp(age_hours, RECENCY_KNOT_HOURS, RECENCY_KNOT_SCORES)
+    
+    def _calculate_engagement_score(self, score: int, comments: int) -> float:
+        """
+        Calculate engagement score from Reddit score and comments
+        Uses logarithmic scaling to prevent very high scores from dominating
+        Comments weighted more heavily to indicate discussion quality
+        """
+        # Combine score and comments (comments weighted more heavily - increased from 2x to 3x)
+        combined_engagement = score + (comments * 3)
+        
+        if combined_engagement <= 0:
+            # Give small base score for new posts with 0 engagement
+            return 0.1
+        
+        if combined_engagement < ENGAGEMENT_LUT_SIZE:
+            normalized_score = self._engagement_lut_values[combined_engagement]
+        else:
+            normalized_score = self._engagement_tier(combined_engagement)
         
         # Quality bonus for discussion-heavy posts (high comment-to-upvote ratio)
         if score > 0:
@@ -100,12 +233,13 @@ class RiverService:
         
         return normalized_score
     
-    def _calculate_recency_score(self, created_at: datetime) -> float:
+    def _calculate_recency_score(self, created_at: datetime, now: Optional[datetime] = None) -> float:
         """
         Calculate recency score (newer posts get higher weight)
         Slower decay curve with extended high-score window
         """
-        now = datetime.now()
+        if now is None:
+            now = datetime.now()
         age_hours = (now - created_at).total_seconds() / 3600
         
         if age_hours <= 6:
@@ -162,6 +296,15 @@ class RiverService:
             # Neutral sentiment gets no bonus or penalty
             return 0.0
     
+    @staticmethod
+    def _importance_array(posts: List[Post]) -> np.ndarray:
+        """Collect importance scores into a contiguous float64 array"""
+        return np.fromiter(
+            (post.importance_score for post in posts),
+            dtype=np.float64,
+            count=len(posts)
+        )
+    
     def filter_and_sort(self, posts: List[Post]) -> List[Post]:
         """
         Filter posts by importance threshold and sort by importance score
@@ -172,14 +315,14 @@ class RiverService:
         Returns:
             Filtered and sorted list of posts
         """
+        scores = self._importance_array(posts)
+        
         # Filter by importance threshold
-        filtered_posts = [
-            post for post in posts 
-            if post.importance_score >= self.importance_threshold
-        ]
+        kept = np.flatnonzero(scores >= self.importance_threshold)
         
-        # Sort by importance score (descending)
-        filtered_posts.sort(key=lambda x: x.importance_score, reverse=True)
+        # Sort by importance score (descending, ties keep input order)
+        order = kept[np.argsort(-scores[kept], kind='stable')]
+        filtered_posts = [posts[i] for i in order.tolist()]
         
         logger.info(f"Filtered {len(posts)} posts to {len(filtered_posts)} important posts")
         
@@ -196,8 +339,13 @@ class RiverService:
         Returns:
             Top posts by importance
         """
-        filtered_posts = self.filter_and_sort(posts)
-        return filtered_posts[:limit]
+        # Bounded heap keeps this O(N log limit) without sorting every post
+        threshold = self.importance_threshold
+        return heapq.nlargest(
+            limit,
+            (post for post in posts if post.importance_score >= threshold),
+            key=lambda post: post.importance_score
+        )
     
     def get_importance_distribution(self, posts: List[Post]) -> dict:
         """
@@ -218,13 +366,14 @@ class RiverService:
                 'count': 0
             }
         
-        scores = [post.importance_score for post in posts]
-        scores.sort()
+        scores = self._importance_array(posts)
+        middle = len(scores) // 2
         
         return {
-            'mean': sum(scores) / len(scores),
-            'median': scores[len(scores) // 2],
-            'min': min(scores),
-            'max': max(scores),
-            'count': len(scores)
+            'mean': float(scores.mean()),
+            # Upper median, selected in O(N) without a full sort
+            'median': float(np.partition(scores, middle)[middle]),
+            'min': float(scores.min()),
+            'max': float(scores.max()),
+            'count': int(scores.size)
         }
@@ -1,19 +1,29 @@
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from typing import Dict
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List
 import logging
+import string
 
 from ..models import SentimentResult
-from ..utils.config import SENTIMENT_THRESHOLDS
+from ..utils.config import SENTIMENT_THRESHOLDS, API_CONFIG
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=None)
+def get_sentiment_analyzer() -> SentimentIntensityAnalyzer:
+    """Return the process-wide VADER analyzer, loading its lexicons on first use"""
+    return SentimentIntensityAnalyzer()
+
 class SentimentService:
     """Service for sentiment analysis using VADER"""
     
     def __init__(self):
-        self.analyzer = SentimentIntensityAnalyzer()
+        self.analyzer = get_sentiment_analyzer()
         self.positive_min = SENTIMENT_THRESHOLDS['positive_min']
         self.negative_max = SENTIMENT_THRESHOLDS['negative_max']
+        # Per-text memo so reposts and re-fetched posts skip VADER entirely
+        self._analyze_cached = lru_cache(maxsize=API_CONFIG['analysis_cache_size'])(self._analyze)
     
     def analyze_sentiment(self, text: str) -> SentimentResult:
         """
@@ -25,9 +35,18 @@ class SentimentService:
         Returns:
             SentimentResult with label and compound score
         """
+        return self._analyze_cached(text)
+    
+    def _analyze(self, text: str) -> SentimentResult:
+        """Uncached VADER analysis behind analyze_sentiment"""
         if not text or not text.strip():
             return SentimentResult(label="neutral", score=0.0)
         
+        # Emoji are expanded to lexicon words inside VADER, so only plain ASCII
+        # text can be ruled out up front
+        if text.isascii() and not self._has_lexicon_token(text):
+            return SentimentResult(label="neutral", score=0.0)
+        
         try:
             # Get VADER sentiment scores
             scores = self.analyzer.polarity_scores(text)
@@ -48,6 +67,43 @@ class SentimentService:
             # Return neutral sentiment on error
             return SentimentResult(label="neutral", score=0.0)
     
+    def _has_lexicon_token(self, text: str) -> bool:
+        """
+        Check whether any token of text carries VADER valence
+        
+        Tokenizes the same way VADER does (whitespace split, surrounding
+        punctuation stripped unless that leaves an emoticon-sized stub), so
+        text without a hit always scores a neutral 0.0 compound.
+        
+        Args:
+            text: Input text to check
+            
+        Returns:
+            True if at least one token is in the VADER lexicon
+        """
+        lexicon = self.analyzer.lexicon
+        punctuation = string.punctuation
+        for token in text.split():
+            stripped = token.strip(punctuation)
+            if len(stripped) <= 2:
+                stripped = token
+            if stripped.lower() in lexicon:
+                return True
+        return False
+    
+    def analyze_batch(self, texts: List[str]) -> List[SentimentResult]:
+        """
+        Analyze sentiment of many texts in one call
+        
+        Args:
+            texts: Input texts to analyze
+            
+        Returns:
+            SentimentResult for each text, in input order
+        """
+        analyze = self.analyze_sentiment
+        return [analyze(text) for text in texts]
+    
     def get_detailed_scores(self, text: str) -> Dict[str, float]:
         """
         Get detailed VADER sentiment scores
@@ -111,10 +167,6 @@ class SentimentService:
         Returns:
             Dictionary with counts for each sentiment
         """
-        distribution = {"positive": 0, "neutral": 0, "negative": 0}
-        
-        for text in texts:
-            result = self.analyze_sentiment(text)
-            distribution[result.label] += 1
+        counts = Counter(result.label for result in self.analyze_batch(texts))
         
-        return distribution
+        return {label: counts[label] for label in ("positive", "neutral", "negative")}
@@ -1,23 +1,94 @@
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Set, Tuple
 import aiohttp
 import logging
 import re
+import time
+from collections import defaultdict
 from dataclasses import dataclass
+from functools import lru_cache
+from heapq import nlargest
+from operator import attrgetter
+
+import ahocorasick
+import orjson
+from cachetools import LRUCache
+
+from ..utils.config import API_CONFIG
+from ..utils.http_client import RedditHTTPClient
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Keywords that mark a search result as technology-related (substring match)
+_SUBREDDIT_TECH_KEYWORDS = (
+    'programming', 'coding', 'developer', 'software', 'tech', 'technology',
+    'computer', 'data', 'ai', 'machine learning', 'web', 'mobile', 'app',
+    'python', 'javascript', 'java', 'react', 'node', 'database', 'cloud',
+    'devops', 'cybersecurity', 'blockchain', 'crypto', 'gamedev', 'ui',
+    'ux', 'design', 'algorithm', 'api', 'framework', 'library'
+)
+_SUBREDDIT_TECH_RE = re.compile(
+    '|'.join(re.escape(keyword) for keyword in _SUBREDDIT_TECH_KEYWORDS),
+    re.IGNORECASE
+)
+
+@lru_cache(maxsize=API_CONFIG['analysis_cache_size'])
+def _is_tech_text(name: str, description: str) -> bool:
+    """Check name and description for tech keywords, memoized per pair"""
+    # One case-insensitive scan stops at the first keyword found
+    return _SUBREDDIT_TECH_RE.search(name + ' ' + description) is not None
+
+@lru_cache(maxsize=API_CONFIG['analysis_cache_size'])
+def _relevance_score(query_lower: str, query_words: Tuple[str, ...], name_lower: str, desc_lower: str) -> float:
+    """Score how well a subreddit matches a query, memoized per combination of lowercased inputs"""
+    score = 0.0
+    
+    # Exact name match
+    if query_lower == name_lower:
+        score += 1.0
+    
+    # Query in name
+    elif query_lower in name_lower:
+        score += 0.8
+    
+    # Name in query
+    elif name_lower in query_lower:
+        score += 0.6
+    
+    # Query in description
+    if query_lower in desc_lower:
+        score += 0.4
+    
+    # Partial word matches
+    for word in query_words:
+        if word in name_lower:
+            score += 0.2
+        if word in desc_lower:
+            score += 0.1
+    
+    # Bonus for subscriber count (logarithmic scaling)
+    # This would require fetching actual subscriber data
+    
+    return min(score, 1.0)
+
+@dataclass(frozen=True)
 class SubredditSuggestion:
+    # Explicit slots (no per-instance __dict__) without needing dataclass(slots=True)
+    __slots__ = ('name', 'subscribers', 'description', 'relevance_score')
+    
     name: str
     subscribers: int
     description: str
     relevance_score: float
 
-class SubredditSearchService:
+class SubredditSearchService(RedditHTTPClient):
     """Service for finding relevant subreddits when exact match fails"""
     
-    def __init__(self):
-        self.user_agent = "TechRelevanceAnalyzer/1.0 (Educational Purpose)"
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        super().__init__(session)
+        # Parsed Reddit responses keyed by URL and params, as (etag, data,
+        # fetched_at); fresh for cache_ttl seconds, then revalidated by ETag
+        self.response_cache = LRUCache(maxsize=API_CONFIG['cache_max_entries'])
+        self.response_ttl = API_CONFIG['cache_ttl']
         
         # Common tech term mappings for quick suggestions
         self.tech_mappings = {
@@ -36,6 +107,71 @@ class SubredditSearchService:
             'devops': ['devops', 'aws', 'azure', 'docker', 'kubernetes'],
             'ui ux': ['ui_design', 'UXDesign', 'web_design', 'graphic_design', 'Figma'],
         }
+        
+        # Partial-match indexes over the mapping terms: an automaton finds terms
+        # inside the query, and a substring table finds terms containing it
+        self.mapping_terms = tuple(self.tech_mappings)
+        self.mapping_automaton = ahocorasick.Automaton()
+        term_substrings: Dict[str, Set[int]] = defaultdict(set)
+        for term_index, term in enumerate(self.mapping_terms):
+            self.mapping_automaton.add_word(term, term_index)
+            for start in range(len(term) + 1):
+                for end in range(start, len(term) + 1):
+                    term_substrings[term[start:end]].add(term_index)
+        self.mapping_automaton.make_automaton()
+        self.mapping_term_substrings = {
+            substring: tuple(sorted(term_indexes))
+            for substring, term_indexes in term_substrings.items()
+        }
+        
+        # Partial-match suggestions per term, built once; suggestions are
+        # immutable, so every search can hand out the same instances
+        self.mapping_term_suggestions = tuple(
+            tuple(
+                SubredditSuggestion(
+                    name=sub_name,
+                    subscribers=0,
+                    description=f"Related to {term}",
+                    relevance_score=0.7  # Medium relevance for partial match
+                )
+                for sub_name in self.tech_mappings[term]
+            )
+            for term in self.mapping_terms
+        )
+    
+    async def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[dict]:
+        """
+        GET a Reddit JSON endpoint through the response cache
+        
+        Args:
+            url: Endpoint URL
+            params: Query parameters
+            
+        Returns:
+            Parsed JSON body, or None if Reddit did not answer with data
+        """
+        key: Tuple = (url, tuple(sorted(params.items())) if params else ())
+        cached = self.response_cache.get(key)
+        now = time.monotonic()
+        
+        if cached is not None and now - cached[2] < self.response_ttl:
+            return cached[1]
+        
+        headers = self.request_headers
+        if cached is not None and cached[0]:
+            headers = {**headers, 'If-None-Match': cached[0]}
+        
+        session = self._get_session()
+        async with session.get(url, params=params, headers=headers) as response:
+            if response.status == 304 and cached is not None:
+                # Unchanged upstream: keep the parsed body and restart its TTL
+                self.response_cache[key] = (cached[0], cached[1], now)
+                return cached[1]
+            if response.status != 200:
+                return None
+            data = orjson.loads(await response.read())
+            self.response_cache[key] = (response.headers.get('ETag'), data, now)
+            return data
     
     async def search_subreddits(self, query: str, limit: int = 5) -> List[SubredditSuggestion]:
         """
@@ -59,39 +195,42 @@ class SubredditSearchService:
             api_suggestions = await self._search_reddit_api(query, limit - len(suggestions))
             suggestions.extend(api_suggestions)
         
-        # 3. Sort by relevance and return top results
-        suggestions.sort(key=lambda x: x.relevance_score, reverse=True)
-        return suggestions[:limit]
+        # 3. Return the top results by relevance (stable, like a full sort)
+        return nlargest(limit, suggestions, key=attrgetter('relevance_score'))
     
     def _get_mapping_suggestions(self, query: str) -> List[SubredditSuggestion]:
         """Get suggestions from predefined tech mappings"""
-        suggestions = []
+        # Keyed by subreddit name so a subreddit reached through several terms
+        # is suggested once, with its best score
+        suggestions: Dict[str, SubredditSuggestion] = {}
         query_lower = query.lower()
         
         # Direct mapping
         if query_lower in self.tech_mappings:
             for sub_name in self.tech_mappings[query_lower]:
-                suggestion = SubredditSuggestion(
+                self._add_suggestion(suggestions, SubredditSuggestion(
                     name=sub_name,
                     subscribers=0,  # Will be fetched later if needed
                     description=f"Related to {query}",
                     relevance_score=0.9  # High relevance for direct mapping
-                )
-                suggestions.append(suggestion)
-        
-        # Partial matching
-        for term, subreddits in self.tech_mappings.items():
-            if query_lower in term or term in query_lower:
-                for sub_name in subreddits:
-                    suggestion = SubredditSuggestion(
-                        name=sub_name,
-                        subscribers=0,
-                        description=f"Related to {term}",
-                        relevance_score=0.7  # Medium relevance for partial match
-                    )
-                    suggestions.append(suggestion)
+                ))
         
-        return suggestions
+        # Partial matching (terms in the query, or the query in a term)
+        matched_terms = {term_index for _, term_index in self.mapping_automaton.iter(query_lower)}
+        matched_terms.update(self.mapping_term_substrings.get(query_lower, ()))
+        
+        for term_index in sorted(matched_terms):
+            for suggestion in self.mapping_term_suggestions[term_index]:
+                self._add_suggestion(suggestions, suggestion)
+        
+        return list(suggestions.values())
+    
+    @staticmethod
+    def _add_suggestion(suggestions: Dict[str, SubredditSuggestion], suggestion: SubredditSuggestion) -> None:
+        """Record a suggestion unless one with the same name already scores at least as high"""
+        existing = suggestions.get(suggestion.name)
+        if existing is None or suggestion.relevance_score > existing.relevance_score:
+            suggestions[suggestion.name] = suggestion
     
     async def _search_reddit_api(self, query: str, limit: int) -> List[SubredditSuggestion]:
         """Search Reddit's API for subreddits"""
@@ -105,27 +244,30 @@ class SubredditSearchService:
                 'limit': limit * 2,  # Get more results to filter
                 'type': 'sr'
             }
-            headers = {'User-Agent': self.user_agent}
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        children = data.get('data', {}).get('children', [])
-                        
-                        for child in children:
-                            sub_data = child.get('data', {})
-                            name = sub_data.get('display_name', '')
-                            
-                            if name and self._is_tech_related(name, sub_data.get('public_description', '')):
-                                suggestion = SubredditSuggestion(
-                                    name=name,
-                                    subscribers=sub_data.get('subscribers', 0),
-                                    description=sub_data.get('public_description', ''),
-                                    relevance_score=self._calculate_relevance(query, name, sub_data.get('public_description', ''))
-                                )
-                                suggestions.append(suggestion)
+            data = await self._get_json(url, params)
+            if data is not None:
+                children = data.get('data', {}).get('children', [])
+                
+                # Query-side inputs to the relevance score are shared by every result
+                query_lower = query.lower()
+                query_words = tuple(query_lower.split())
+                
+                for child in children:
+                    sub_data = child.get('data', {})
+                    name = sub_data.get('display_name', '')
+                    description = sub_data.get('public_description', '')
                     
+                    if name and self._is_tech_related(name, description):
+                        suggestion = SubredditSuggestion(
+                            name=name,
+                            subscribers=sub_data.get('subscribers', 0),
+                            description=description,
+                            relevance_score=self._calculate_relevance(
+                                query_lower, query_words, name.lower(), description.lower()
+                            )
+                        )
+                        suggestions.append(suggestion)
+        
         except Exception as e:
             logger.error(f"Error searching Reddit API: {str(e)}")
         
@@ -133,71 +275,36 @@ class SubredditSearchService:
     
     def _is_tech_related(self, name: str, description: str) -> bool:
         """Check if a subreddit is technology-related"""
-        tech_keywords = [
-            'programming', 'coding', 'developer', 'software', 'tech', 'technology',
-            'computer', 'data', 'ai', 'machine learning', 'web', 'mobile', 'app',
-            'python', 'javascript', 'java', 'react', 'node', 'database', 'cloud',
-            'devops', 'cybersecurity', 'blockchain', 'crypto', 'gamedev', 'ui',
-            'ux', 'design', 'algorithm', 'api', 'framework', 'library'
-        ]
-        
-        text_to_check = (name + ' ' + description).lower()
-        
-        # Check if any tech keywords are present
-        for keyword in tech_keywords:
-            if keyword in text_to_check:
-                return True
-        
-        return False
+        return _is_tech_text(name, description)
     
-    def _calculate_relevance(self, query: str, name: str, description: str) -> float:
-        """Calculate relevance score for a subreddit suggestion"""
-        query_lower = query.lower()
-        name_lower = name.lower()
-        desc_lower = description.lower()
-        
-        score = 0.0
-        
-        # Exact name match
-        if query_lower == name_lower:
-            score += 1.0
-        
-        # Query in name
-        elif query_lower in name_lower:
-            score += 0.8
-        
-        # Name in query
-        elif name_lower in query_lower:
-            score += 0.6
-        
-        # Query in description
-        if query_lower in desc_lower:
-            score += 0.4
-        
-        # Partial word matches
-        query_words = query_lower.split()
-        for word in query_words:
-            if word in name_lower:
-                score += 0.2
-            if word in desc_lower:
-                score += 0.1
-        
-        # Bonus for subscriber count (logarithmic scaling)
-        # This would require fetching actual subscriber data
+    def _calculate_relevance(
+        self,
+        query_lower: str,
+        query_words: Tuple[str, ...],
+        name_lower: str,
+        desc_lower: str
+    ) -> float:
+        """
+        Calculate relevance score for a subreddit suggestion
         
-        return min(score, 1.0)
+        Args:
+            query_lower: Lowercased search query
+            query_words: Words of the lowercased query
+            name_lower: Lowercased subreddit name
+            desc_lower: Lowercased subreddit description
+            
+        Returns:
+            Relevance score (0.0 to 1.0)
+        """
+        return _relevance_score(query_lower, query_words, name_lower, desc_lower)
     
     async def get_subreddit_info(self, subreddit_name: str) -> Optional[Dict]:
         """Get detailed information about a specific subreddit"""
         try:
             url = f"https://www.reddit.com/r/{subreddit_name}/about.json"
-            headers = {'User-Agent': self.user_agent}
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('data', {})
+            data = await self._get_json(url)
+            if data is not None:
+                return data.get('data', {})
         except Exception as e:
             logger.error(f"Error fetching subreddit info for {subreddit_name}: {str(e)}")
         
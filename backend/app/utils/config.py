@@ -2,6 +2,8 @@
 Configuration and constants for the Tech Relevance & Sentiment Analyzer
 """
 
+import os
+
 # Technology keywords organized by category
 TECH_KEYWORDS = {
     'ai_ml': [
@@ -42,9 +44,15 @@ TECH_KEYWORDS = {
 
 # API Configuration
 API_CONFIG = {
-    'rate_limit_delay': 2.0,  # seconds between Reddit requests
+    'reddit_requests_per_minute': 30,  # token bucket size for unauthenticated Reddit API calls
+    'reddit_max_concurrency': 8,  # max in-flight Reddit requests
     'cache_ttl': 300,  # seconds (5 minutes)
+    'cache_max_entries': 1024,  # bounded so the cache cannot grow without limit
+    'redis_url': os.environ.get('REDIS_URL'),  # optional shared L2 cache across worker processes
+    'redis_timeout': 0.5,  # seconds before a Redis connect or command counts as a miss
     'max_posts_per_request': 100,
+    'analysis_cache_size': 8192,  # texts memoized by the sentiment and relevance services
+    'http_pool_size': 32,  # max pooled connections in the shared HTTP session
     'importance_threshold': 0.15,  # minimum importance score for river feed (filters low-quality posts)
     'default_subreddit': 'technology'
 }
@@ -0,0 +1,26 @@
+from types import MappingProxyType
+from typing import Optional
+
+import aiohttp
+
+class RedditHTTPClient:
+    """Base for services that call Reddit over one shared HTTP session"""
+    
+    user_agent = "TechRelevanceAnalyzer/1.0 (Educational Purpose)"
+    # Built once and shared read-only by every request
+    request_headers = MappingProxyType({"User-Agent": user_agent})
+    
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        # Shared HTTP session so keepalive connections are reused across requests
+        self.session = session
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the HTTP session, creating one on first use if none was injected"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(headers={"User-Agent": self.user_agent})
+        return self.session
+    
+    async def close(self) -> None:
+        """Close the HTTP session"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
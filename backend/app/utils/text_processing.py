@@ -1,17 +1,16 @@
 import re
-import hashlib
 from typing import List
 
+import xxhash
+
+# Patterns to clean up text, compiled once for every TextProcessor
+_URL_RE = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+_HASHTAG_RE = re.compile(r'#(\w+)')
+_MENTION_RE = re.compile(r'@(\w+)')
+
 class TextProcessor:
     """Utility class for text processing and normalization"""
     
-    def __init__(self):
-        # Patterns to clean up text
-        self.url_pattern = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
-        self.excessive_whitespace = re.compile(r'\s+')
-        self.hashtag_pattern = re.compile(r'#(\w+)')
-        self.mention_pattern = re.compile(r'@(\w+)')
-    
     def normalize_text(self, text: str) -> str:
         """
         Normalize text by:
@@ -23,19 +22,12 @@ class TextProcessor:
         if not text:
             return ""
         
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove URLs but keep hashtags and mentions
-        text = self.url_pattern.sub(' ', text)
-        
-        # Normalize whitespace
-        text = self.excessive_whitespace.sub(' ', text)
-        
-        # Strip leading/trailing whitespace
-        text = text.strip()
+        # Convert to lowercase and remove URLs but keep hashtags and mentions
+        text = _URL_RE.sub(' ', text.lower())
         
-        return text
+        # Normalize whitespace and strip the ends in one pass; str.split()
+        # breaks on exactly the characters \s matches
+        return ' '.join(text.split())
     
     def combine_title_body(self, title: str, body: str) -> str:
         """
@@ -62,27 +54,29 @@ class TextProcessor:
     
     def extract_hashtags(self, text: str) -> list[str]:
         """Extract hashtags from text"""
-        return self.hashtag_pattern.findall(text.lower())
+        # Lowercase only the captured tags, not a copy of the whole text
+        return [tag.lower() for tag in _HASHTAG_RE.findall(text)]
     
     def extract_mentions(self, text: str) -> list[str]:
         """Extract mentions from text"""
-        return self.mention_pattern.findall(text.lower())
+        return [mention.lower() for mention in _MENTION_RE.findall(text)]
     
     def create_content_hash(self, text: str) -> str:
         """Create hash for content deduplication"""
         normalized_text = self.normalize_text(text)
-        return hashlib.md5(normalized_text.encode('utf-8')).hexdigest()
+        # Non-cryptographic 64-bit hash; collisions only risk merging duplicates
+        return xxhash.xxh3_64_hexdigest(normalized_text.encode('utf-8'))
     
     def truncate_text(self, text: str, max_length: int = 500) -> str:
         """Truncate text to maximum length while preserving word boundaries"""
         if len(text) <= max_length:
             return text
         
-        # Find the last space before max_length
+        # Split at the last space before max_length in one call
         truncated = text[:max_length]
-        last_space = truncated.rfind(' ')
+        head, space, _ = truncated.rpartition(' ')
         
-        if last_space > max_length * 0.8:  # If we have a good breaking point
-            truncated = truncated[:last_space]
+        if space and len(head) > max_length * 0.8:  # If we have a good breaking point
+            truncated = head
         
         return truncated + "..."